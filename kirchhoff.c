@@ -16,67 +16,361 @@ static gboolean on_draw(GtkWidget *widget, cairo_t *cr, gpointer data);
 static gboolean on_button_press(GtkWidget *widget, GdkEventButton *event, gpointer data);
 static void redraw_circuit(KirchhoffData *data);
 static void add_node(KirchhoffData *data, double x, double y);
+static void add_component(KirchhoffData *data, int c);
 static void clear_circuit(GtkWidget *widget, gpointer user_data);
 static void calculate_callback(GtkWidget *widget, gpointer user_data);
 static void mode_changed(GtkWidget *widget, gpointer user_data);
+static void on_canvas_destroy(GtkWidget *widget, gpointer user_data);
 
 // Matrix operations for circuit analysis
-static int solve_linear_system(int n, double **A, double *b, double *x) {
-    // Gaussian elimination with partial pivoting
-    double **aug = malloc(n * sizeof(double *));
-    for (int i = 0; i < n; i++) {
-        aug[i] = malloc((n + 1) * sizeof(double));
-        for (int j = 0; j < n; j++) {
-            aug[i][j] = A[i][j];
-        }
-        aug[i][n] = b[i];
-    }
+// Matrices are row-major n x n blocks stored contiguously
+
+// LU-factorize A in place (Gaussian elimination with partial pivoting).
+// The multipliers of L are kept below the diagonal, U on and above it,
+// and perm records which original row ended up at each position.
+static int lu_factor(int n, double *A, int *perm) {
+    for (int i = 0; i < n; i++) perm[i] = i;
     
-    // Forward elimination
     for (int i = 0; i < n; i++) {
         // Find pivot
         int max_row = i;
         for (int k = i + 1; k < n; k++) {
-            if (fabs(aug[k][i]) > fabs(aug[max_row][i])) {
+            if (fabs(A[k * n + i]) > fabs(A[max_row * n + i])) {
                 max_row = k;
             }
         }
         
         // Swap rows
-        double *temp = aug[i];
-        aug[i] = aug[max_row];
-        aug[max_row] = temp;
+        if (max_row != i) {
+            for (int j = 0; j < n; j++) {
+                double temp = A[i * n + j];
+                A[i * n + j] = A[max_row * n + j];
+                A[max_row * n + j] = temp;
+            }
+            int temp = perm[i];
+            perm[i] = perm[max_row];
+            perm[max_row] = temp;
+        }
         
         // Check for singular matrix
-        if (fabs(aug[i][i]) < 1e-10) {
-            for (int k = 0; k < n; k++) free(aug[k]);
-            free(aug);
+        if (fabs(A[i * n + i]) < 1e-10) {
             return 0;
         }
         
-        // Eliminate column
+        // Eliminate column. Nodal matrices are mostly zeros (each node only
+        // couples to its neighbours), so rows with nothing below the pivot
+        // are skipped instead of being updated with a zero factor.
         for (int k = i + 1; k < n; k++) {
-            double factor = aug[k][i] / aug[i][i];
-            for (int j = i; j <= n; j++) {
-                aug[k][j] -= factor * aug[i][j];
+            if (A[k * n + i] == 0.0) continue;
+            double factor = A[k * n + i] / A[i * n + i];
+            A[k * n + i] = factor;
+            for (int j = i + 1; j < n; j++) {
+                A[k * n + j] -= factor * A[i * n + j];
             }
         }
     }
     
+    return 1;
+}
+
+// Solve A * x = b using the factorization produced by lu_factor()
+static void lu_solve(int n, const double *LU, const int *perm,
+                     const double *b, double *x) {
+    // Forward substitution (L has an implicit unit diagonal)
+    for (int i = 0; i < n; i++) {
+        x[i] = b[perm[i]];
+        for (int j = 0; j < i; j++) {
+            x[i] -= LU[i * n + j] * x[j];
+        }
+    }
+    
     // Back substitution
     for (int i = n - 1; i >= 0; i--) {
-        x[i] = aug[i][n];
         for (int j = i + 1; j < n; j++) {
-            x[i] -= aug[i][j] * x[j];
+            x[i] -= LU[i * n + j] * x[j];
         }
-        x[i] /= aug[i][i];
+        x[i] /= LU[i * n + i];
     }
+}
+
+// Solve G * V = I. G is factored in place.
+static int solve_linear_system(int n, double *G, const double *I, double *V) {
+    int perm[MAX_NODES];
     
-    for (int i = 0; i < n; i++) free(aug[i]);
-    free(aug);
+    if (!lu_factor(n, G, perm)) return 0;
+    
+    lu_solve(n, G, perm, I, V);
     return 1;
 }
 
+// Stamp a conductance g between matrix rows idx1 and idx2 (-1 = ground).
+// Rows marked in forced hold a voltage-source equation and are left alone.
+static void stamp_conductance(double *G, int n, const char *forced,
+                              int idx1, int idx2, double g) {
+    if (idx1 >= 0 && !forced[idx1]) {
+        G[idx1 * n + idx1] += g;
+        if (idx2 >= 0) G[idx1 * n + idx2] -= g;
+    }
+    if (idx2 >= 0 && !forced[idx2]) {
+        G[idx2 * n + idx2] += g;
+        if (idx1 >= 0) G[idx2 * n + idx1] -= g;
+    }
+}
+
+// Copy component src over slot dst
+static void move_component(ComponentTable *comps, int dst, int src) {
+    if (dst == src) return;
+    
+    comps->node1[dst] = comps->node1[src];
+    comps->node2[dst] = comps->node2[src];
+    comps->value[dst] = comps->value[src];
+    comps->type[dst] = comps->type[src];
+    comps->current[dst] = comps->current[src];
+    comps->ux[dst] = comps->ux[src];
+    comps->uy[dst] = comps->uy[src];
+    memcpy(comps->label[dst], comps->label[src], sizeof(comps->label[dst]));
+    comps->label_width[dst] = comps->label_width[src];
+}
+
+// Build the nodal-analysis system G * V = I for the given components.
+// node_index maps node ids to matrix rows, with -1 for ground; G (n x n,
+// row-major) and I must be zeroed by the caller.
+static void build_nodal_system(const ComponentTable *comps, int count,
+                               const int *node_index, int n,
+                               double *G, double *I) {
+    // First pass: find the rows fixed by grounded voltage sources, so
+    // nothing is stamped into them and no row has to be cleared later
+    char forced[MAX_NODES] = {0};
+    double forced_value[MAX_NODES];
+    
+    for (int c = 0; c < count; c++) {
+        if (comps->type[c] != COMP_VOLTAGE_SOURCE) continue;
+        
+        int idx1 = node_index[comps->node1[c]];
+        int idx2 = node_index[comps->node2[c]];
+        
+        if (idx1 < 0 && idx2 >= 0) {
+            // n1 is ground (+), n2 is node (-). V_n1 - V_n2 = Val => 0 - V_n2 = Val => V_n2 = -Val
+            forced[idx2] = 1;
+            forced_value[idx2] = -comps->value[c];
+        }
+        else if (idx2 < 0 && idx1 >= 0) {
+            // n1 is node (+), n2 is ground (-). V_n1 - 0 = Val
+            forced[idx1] = 1;
+            forced_value[idx1] = comps->value[c];
+        }
+    }
+    
+    // Second pass: stamp resistors and floating sources into the free rows
+    for (int c = 0; c < count; c++) {
+        int idx1 = node_index[comps->node1[c]];
+        int idx2 = node_index[comps->node2[c]];
+        double value = comps->value[c];
+        
+        switch (comps->type[c]) {
+        case COMP_RESISTOR:
+            stamp_conductance(G, n, forced, idx1, idx2, 1.0 / value);
+            break;
+            
+        case COMP_VOLTAGE_SOURCE:
+            // Floating Voltage Source (Between two non-ground nodes)
+            // Fix: Use Norton Equivalent (Current Source || Small Resistor)
+            if (idx1 >= 0 && idx2 >= 0) {
+                // Use a very small internal resistance to model the ideal source
+                double r_internal = 0.01;
+                double g_internal = 1.0 / r_internal;
+                double i_injected = value / r_internal;
+                
+                // Update Conductance Matrix (Resistor part)
+                stamp_conductance(G, n, forced, idx1, idx2, g_internal);
+                
+                // Update Current Vector (Source part)
+                // Current is injected into Positive Node (n1) and extracted from Negative Node (n2)
+                if (!forced[idx1]) I[idx1] += i_injected;
+                if (!forced[idx2]) I[idx2] -= i_injected;
+            }
+            break;
+            
+        default:
+            break;
+        }
+    }
+    
+    // Grounded sources: forcing method (V_idx = value) for precision
+    for (int i = 0; i < n; i++) {
+        if (!forced[i]) continue;
+        G[i * n + i] = 1.0;
+        I[i] = forced_value[i];
+    }
+}
+
+static void draw_component(cairo_t *cr, KirchhoffData *data, int c) {
+    ComponentTable *comps = &data->components;
+    double x1 = data->nodes[comps->node1[c]].x;
+    double y1 = data->nodes[comps->node1[c]].y;
+    double x2 = data->nodes[comps->node2[c]].x;
+    double y2 = data->nodes[comps->node2[c]].y;
+    
+    // Draw edge with better visibility and anti-aliasing
+    cairo_set_line_width(cr, 2.5);
+    cairo_set_source_rgb(cr, 0.0, 0.0, 0.0); // Strictly BLACK edges
+    cairo_move_to(cr, x1, y1);
+    cairo_line_to(cr, x2, y2);
+    cairo_stroke(cr);
+    
+    // Add subtle outer glow for better visibility
+    cairo_set_line_width(cr, 3.5);
+    cairo_set_source_rgba(cr, 0.0, 0.0, 0.0, 0.2);
+    cairo_move_to(cr, x1, y1);
+    cairo_line_to(cr, x2, y2);
+    cairo_stroke(cr);
+    
+    double mid_x = (x1 + x2) / 2;
+    double mid_y = (y1 + y2) / 2;
+    
+    // Font settings (the face is resolved once in kirchhoff_init)
+    cairo_set_font_face(cr, data->label_font);
+    
+    cairo_set_font_size(cr, 15);
+    
+    // The label text never changes after the component is placed, so it is
+    // only measured the first time it is drawn
+    if (comps->label_width[c] < 0) {
+        cairo_text_extents_t extents;
+        cairo_text_extents(cr, comps->label[c], &extents);
+        comps->label_width[c] = extents.width;
+    }
+    
+    // Perpendicular offset to avoid edge overlap
+    double offset_x = -comps->uy[c] * 25;
+    double offset_y = comps->ux[c] * 25;
+    
+    // Draw text
+    cairo_set_source_rgb(cr, 0.0, 0.0, 0.0);
+    cairo_move_to(cr, mid_x + offset_x - comps->label_width[c]/2, mid_y + offset_y + 5);
+    cairo_show_text(cr, comps->label[c]);
+}
+
+// Draw the current arrows of all components as one path and a single
+// stroke, then their labels, instead of stroking each arrow separately
+static void draw_currents(cairo_t *cr, KirchhoffData *data) {
+    const ComponentTable *comps = &data->components;
+    cairo_new_path(cr);
+    
+    for (int c = 0; c < data->component_count; c++) {
+        if (!data->node_exists[comps->node1[c]] || !data->node_exists[comps->node2[c]]) continue;
+        if (fabs(comps->current[c]) <= 0.001) continue;
+        
+        double mid_x = (data->nodes[comps->node1[c]].x + data->nodes[comps->node2[c]].x) / 2;
+        double mid_y = (data->nodes[comps->node1[c]].y + data->nodes[comps->node2[c]].y) / 2;
+        
+        // Arrow direction: the component's unit vector, flipped for
+        // negative current
+        double sign = copysign(1.0, comps->current[c]);
+        double dir_x = sign * comps->ux[c];
+        double dir_y = sign * comps->uy[c];
+        double arrow_len = 15;
+        
+        double ax = mid_x + arrow_len * dir_x;
+        double ay = mid_y + arrow_len * dir_y;
+        
+        cairo_move_to(cr, mid_x, mid_y);
+        cairo_line_to(cr, ax, ay);
+        
+        // Arrow head: the direction rotated by +/-30 degrees
+        double head_cos = 0.8660254037844386; // cos(pi/6)
+        double head_sin = 0.5;                // sin(pi/6)
+        cairo_line_to(cr, ax - 5 * (dir_x * head_cos - dir_y * head_sin),
+                          ay - 5 * (dir_y * head_cos + dir_x * head_sin));
+        cairo_move_to(cr, ax, ay);
+        cairo_line_to(cr, ax - 5 * (dir_x * head_cos + dir_y * head_sin),
+                          ay - 5 * (dir_y * head_cos - dir_x * head_sin));
+    }
+    
+    cairo_set_source_rgb(cr, 0.0, 0.0, 0.0); // Black Arrow
+    cairo_set_line_width(cr, 2);
+    cairo_stroke(cr);
+    
+    // Current values
+    cairo_set_font_face(cr, data->label_font);
+    cairo_set_font_size(cr, 9);
+    
+    for (int c = 0; c < data->component_count; c++) {
+        if (!data->node_exists[comps->node1[c]] || !data->node_exists[comps->node2[c]]) continue;
+        if (fabs(comps->current[c]) <= 0.001) continue;
+        
+        double mid_x = (data->nodes[comps->node1[c]].x + data->nodes[comps->node2[c]].x) / 2;
+        double mid_y = (data->nodes[comps->node1[c]].y + data->nodes[comps->node2[c]].y) / 2;
+        
+        char label[50];
+        sprintf(label, "%.2fA", fabs(comps->current[c]));
+        cairo_move_to(cr, mid_x - 15, mid_y + 15);
+        cairo_show_text(cr, label);
+    }
+}
+
+static void draw_node(cairo_t *cr, KirchhoffData *data, int i) {
+    double x = data->nodes[i].x;
+    double y = data->nodes[i].y;
+    
+    // [FIX 1] Start a fresh path for every node to prevent the 
+    // "Random Green Line" connecting the previous text position to this circle.
+    cairo_new_path(cr);
+
+    // Circle (filled green)
+    cairo_set_source_rgb(cr, 0.506, 0.780, 0.514); // #81c784
+    cairo_arc(cr, x, y, 14, 0, 2 * M_PI); // Radius 14
+    cairo_fill_preserve(cr);
+    
+    // Border (stroked dark green)
+    cairo_set_source_rgb(cr, 0.333, 0.545, 0.184); // #558b2f
+    cairo_set_line_width(cr, 2);
+    cairo_stroke(cr);
+    
+    // Label
+    cairo_set_source_rgb(cr, 1.0, 1.0, 1.0); // White text
+    cairo_set_font_face(cr, data->label_font);
+    cairo_set_font_size(cr, 12);
+    
+    cairo_move_to(cr, x - 10, y - 28); 
+    cairo_show_text(cr, data->nodes[i].label);
+
+    // [FIX 2] Reset color to BLACK after drawing the node
+    cairo_set_source_rgb(cr, 0.0, 0.0, 0.0);
+}
+
+static gboolean flush_redraw(gpointer user_data) {
+    KirchhoffData *data = (KirchhoffData *)user_data;
+    data->redraw_source = 0;
+    redraw_circuit(data);
+    return G_SOURCE_REMOVE;
+}
+
+// Coalesce full redraws: any number of requests made while handling one
+// event result in a single repaint once GTK is idle
+static void schedule_redraw(KirchhoffData *data) {
+    if (!data->redraw_source) {
+        data->redraw_source = g_idle_add(flush_redraw, data);
+    }
+}
+
+// Returns a context on the existing surface when it still matches the
+// canvas size, so a single addition can be painted over what is there.
+// Returns NULL when a full redraw is needed (or already pending) instead.
+static cairo_t *begin_incremental_draw(KirchhoffData *data) {
+    if (!data->surface || data->redraw_source) return NULL;
+    
+    GtkAllocation allocation;
+    gtk_widget_get_allocation(data->canvas, &allocation);
+    
+    if (cairo_image_surface_get_width(data->surface) != allocation.width ||
+        cairo_image_surface_get_height(data->surface) != allocation.height) {
+        return NULL;
+    }
+    
+    return cairo_create(data->surface);
+}
+
 static void add_node(KirchhoffData *data, double x, double y) {
     int node_id = -1;
     
@@ -92,10 +386,37 @@ static void add_node(KirchhoffData *data, double x, double y) {
     
     data->nodes[node_id].x = x;
     data->nodes[node_id].y = y;
+    sprintf(data->nodes[node_id].label, "N%d", node_id);
     data->node_exists[node_id] = 1;
     data->node_count++;
     
-    redraw_circuit(data);
+    // Nodes are drawn last, so a new one can simply be painted on top
+    cairo_t *cr = begin_incremental_draw(data);
+    if (!cr) {
+        schedule_redraw(data);
+        return;
+    }
+    
+    draw_node(cr, data, node_id);
+    cairo_destroy(cr);
+    gtk_widget_queue_draw(data->canvas);
+}
+
+static void add_component(KirchhoffData *data, int c) {
+    cairo_t *cr = begin_incremental_draw(data);
+    if (!cr) {
+        schedule_redraw(data);
+        return;
+    }
+    
+    // Draw the new component, then repaint the nodes so they stay on top
+    draw_component(cr, data, c);
+    for (int i = 0; i < MAX_NODES; i++) {
+        if (data->node_exists[i]) draw_node(cr, data, i);
+    }
+    
+    cairo_destroy(cr);
+    gtk_widget_queue_draw(data->canvas);
 }
 
 static void redraw_circuit(KirchhoffData *data) {
@@ -107,13 +428,19 @@ static void redraw_circuit(KirchhoffData *data) {
         return;
     }
     
-    if (data->surface) {
+    // Keep the existing surface unless the canvas has been resized
+    if (data->surface &&
+        (cairo_image_surface_get_width(data->surface) != allocation.width ||
+         cairo_image_surface_get_height(data->surface) != allocation.height)) {
         cairo_surface_destroy(data->surface);
+        data->surface = NULL;
     }
     
-    data->surface = cairo_image_surface_create(CAIRO_FORMAT_ARGB32,
-                                               allocation.width,
-                                               allocation.height);
+    if (!data->surface) {
+        data->surface = cairo_image_surface_create(CAIRO_FORMAT_ARGB32,
+                                                   allocation.width,
+                                                   allocation.height);
+    }
     cairo_t *cr = cairo_create(data->surface);
     
     // White background
@@ -121,138 +448,21 @@ static void redraw_circuit(KirchhoffData *data) {
     cairo_paint(cr);
     
     // Draw components
-    for (int i = 0; i < data->component_count; i++) {
-        Component *comp = &data->components[i];
-        
-        if (!data->node_exists[comp->node1] || !data->node_exists[comp->node2]) {
+    for (int c = 0; c < data->component_count; c++) {
+        if (!data->node_exists[data->components.node1[c]] ||
+            !data->node_exists[data->components.node2[c]]) {
             continue;
         }
         
-        double x1 = data->nodes[comp->node1].x;
-        double y1 = data->nodes[comp->node1].y;
-        double x2 = data->nodes[comp->node2].x;
-        double y2 = data->nodes[comp->node2].y;
-        
-        // Draw edge with better visibility and anti-aliasing
-        cairo_set_line_width(cr, 2.5);
-        cairo_set_source_rgb(cr, 0.0, 0.0, 0.0); // Strictly BLACK edges
-        cairo_move_to(cr, x1, y1);
-        cairo_line_to(cr, x2, y2);
-        cairo_stroke(cr);
-        
-        // Add subtle outer glow for better visibility
-        cairo_set_line_width(cr, 3.5);
-        cairo_set_source_rgba(cr, 0.0, 0.0, 0.0, 0.2);
-        cairo_move_to(cr, x1, y1);
-        cairo_line_to(cr, x2, y2);
-        cairo_stroke(cr);
-        
-        // Prepare label
-        double mid_x = (x1 + x2) / 2;
-        double mid_y = (y1 + y2) / 2;
-        
-        char label[50];
-        if (comp->type == COMP_RESISTOR) {
-            sprintf(label, "%.1fΩ", comp->value);
-        } else if (comp->type == COMP_VOLTAGE_SOURCE) {
-            sprintf(label, "%.1fV", comp->value);
-        }
-        
-        // Font settings
-        cairo_text_extents_t extents;
-        cairo_select_font_face(cr, "Times New Roman",
-                               CAIRO_FONT_SLANT_NORMAL,
-                               CAIRO_FONT_WEIGHT_BOLD);
-        
-        cairo_set_font_size(cr, 15);
-        cairo_text_extents(cr, label, &extents);
-        
-        // Calculate perpendicular offset to avoid edge overlap
-        double dx = x2 - x1;
-        double dy = y2 - y1;
-        double len = sqrt(dx*dx + dy*dy);
-        
-        double offset_x = -dy / len * 25; 
-        double offset_y = dx / len * 25;
-        
-        // Draw text
-        cairo_set_source_rgb(cr, 0.0, 0.0, 0.0);
-        cairo_move_to(cr, mid_x + offset_x - extents.width/2, mid_y + offset_y + 5);
-        cairo_show_text(cr, label);
-        
-        // Draw current arrow if calculated
-        if (fabs(comp->current) > 0.001) {
-            cairo_set_source_rgb(cr, 0.0, 0.0, 0.0); // Black Arrow
-            
-            double angle = atan2(y2 - y1, x2 - x1);
-            double arrow_len = 15;
-            
-            double ax, ay;
-            if (comp->current > 0) {
-                ax = mid_x + arrow_len * cos(angle);
-                ay = mid_y + arrow_len * sin(angle);
-            } else {
-                ax = mid_x - arrow_len * cos(angle);
-                ay = mid_y - arrow_len * sin(angle);
-            }
-            
-            cairo_set_line_width(cr, 2);
-            cairo_move_to(cr, mid_x, mid_y);
-            cairo_line_to(cr, ax, ay);
-            
-            // Arrow head
-            double arrow_angle1 = angle + 3.14159 / 6;
-            double arrow_angle2 = angle - 3.14159 / 6;
-            cairo_line_to(cr, ax - 5 * cos(arrow_angle1), ay - 5 * sin(arrow_angle1));
-            cairo_move_to(cr, ax, ay);
-            cairo_line_to(cr, ax - 5 * cos(arrow_angle2), ay - 5 * sin(arrow_angle2));
-            cairo_stroke(cr);
-            
-            // Current value
-            sprintf(label, "%.2fA", fabs(comp->current));
-            cairo_set_font_size(cr, 9);
-            cairo_set_source_rgb(cr, 0.0, 0.0, 0.0);
-            cairo_move_to(cr, mid_x - 15, mid_y + 15);
-            cairo_show_text(cr, label);
-        }
+        draw_component(cr, data, c);
     }
     
+    draw_currents(cr, data);
+    
     // Draw nodes
     for (int i = 0; i < MAX_NODES; i++) {
         if (!data->node_exists[i]) continue;
-        
-        double x = data->nodes[i].x;
-        double y = data->nodes[i].y;
-        
-        // [FIX 1] Start a fresh path for every node to prevent the 
-        // "Random Green Line" connecting the previous text position to this circle.
-        cairo_new_path(cr);
-
-        // Circle (filled green)
-        cairo_set_source_rgb(cr, 0.506, 0.780, 0.514); // #81c784
-        cairo_arc(cr, x, y, 14, 0, 2 * M_PI); // Radius 14
-        cairo_fill_preserve(cr);
-        
-        // Border (stroked dark green)
-        cairo_set_source_rgb(cr, 0.333, 0.545, 0.184); // #558b2f
-        cairo_set_line_width(cr, 2);
-        cairo_stroke(cr);
-        
-        // Label
-        char label[10];
-        sprintf(label, "N%d", i);
-        
-        cairo_set_source_rgb(cr, 1.0, 1.0, 1.0); // White text
-        cairo_select_font_face(cr, "Times New Roman",
-                               CAIRO_FONT_SLANT_NORMAL,
-                               CAIRO_FONT_WEIGHT_BOLD);
-        cairo_set_font_size(cr, 12);
-        
-        cairo_move_to(cr, x - 10, y - 28); 
-        cairo_show_text(cr, label);
-
-        // [FIX 2] Reset color to BLACK after drawing the node
-        cairo_set_source_rgb(cr, 0.0, 0.0, 0.0);
+        draw_node(cr, data, i);
     }
     
     cairo_destroy(cr);
@@ -292,15 +502,21 @@ static gboolean on_draw(GtkWidget *widget, cairo_t *cr, gpointer data) {
 
 static int find_nearest_node(KirchhoffData *data, double x, double y) {
     int nearest = -1;
-    double min_dist = 25; // Increased hit-box from 20 to 25
+    // Compare squared distances so no sqrt() is needed per node
+    double min_dist_sq = 25 * 25; // Increased hit-box from 20 to 25
     
     for (int i = 0; i < MAX_NODES; i++) {
         if (!data->node_exists[i]) continue;
         
-        double dist = sqrt((x - data->nodes[i].x) * (x - data->nodes[i].x) +
-                           (y - data->nodes[i].y) * (y - data->nodes[i].y));
-        if (dist < min_dist) {
-            min_dist = dist;
+        double dx = x - data->nodes[i].x;
+        double dy = y - data->nodes[i].y;
+        
+        // Cheap reject before the multiply for nodes clearly out of reach
+        if (fabs(dx) >= 25 || fabs(dy) >= 25) continue;
+        
+        double dist_sq = dx * dx + dy * dy;
+        if (dist_sq < min_dist_sq) {
+            min_dist_sq = dist_sq;
             nearest = i;
         }
     }
@@ -308,6 +524,46 @@ static int find_nearest_node(KirchhoffData *data, double x, double y) {
     return nearest;
 }
 
+// Drop component c from a node's incidence list
+static void unlink_component(KirchhoffData *data, int node, int c) {
+    guint8 *list = data->node_comps[node];
+    for (int k = 0; k < data->node_degree[node]; k++) {
+        if (list[k] == c) {
+            list[k] = list[--data->node_degree[node]];
+            return;
+        }
+    }
+}
+
+// Point a node's incidence entry for component old_c at new_c
+static void relink_component(KirchhoffData *data, int node, int old_c, int new_c) {
+    guint8 *list = data->node_comps[node];
+    for (int k = 0; k < data->node_degree[node]; k++) {
+        if (list[k] == old_c) {
+            list[k] = new_c;
+            return;
+        }
+    }
+}
+
+// Remove component c by moving the last component into its slot, so the
+// cost depends on the degree of the nodes involved, not the circuit size
+static void remove_component(KirchhoffData *data, int c) {
+    ComponentTable *comps = &data->components;
+    int last = data->component_count - 1;
+    
+    unlink_component(data, comps->node1[c], c);
+    unlink_component(data, comps->node2[c], c);
+    
+    if (c != last) {
+        relink_component(data, comps->node1[last], last, c);
+        relink_component(data, comps->node2[last], last, c);
+        move_component(comps, c, last);
+    }
+    
+    data->component_count--;
+}
+
 static gboolean on_button_press(GtkWidget *widget, GdkEventButton *event, gpointer data) {
     KirchhoffData *k_data = (KirchhoffData *)data;
     
@@ -341,19 +597,41 @@ static gboolean on_button_press(GtkWidget *widget, GdkEventButton *event, gpoint
 
                     // Add component
                     if (k_data->component_count < MAX_COMPONENTS) {
-                        Component *comp = &k_data->components[k_data->component_count];
-                        comp->node1 = k_data->selected_node;
-                        comp->node2 = node;
+                        ComponentTable *comps = &k_data->components;
+                        int c = k_data->component_count;
+                        comps->node1[c] = k_data->selected_node;
+                        comps->node2[c] = node;
                         
                         // Assign the freshly read value
-                        comp->value = k_data->component_value;
+                        comps->value[c] = k_data->component_value;
+                        
+                        comps->type[c] = strcmp(k_data->mode, "add_resistor") == 0 ? 
+                                         COMP_RESISTOR : COMP_VOLTAGE_SOURCE;
+                        comps->current[c] = 0;
                         
-                        comp->type = strcmp(k_data->mode, "add_resistor") == 0 ? 
-                                     COMP_RESISTOR : COMP_VOLTAGE_SOURCE;
-                        comp->current = 0;
+                        if (comps->type[c] == COMP_RESISTOR) {
+                            snprintf(comps->label[c], sizeof(comps->label[c]),
+                                     "%.1fΩ", comps->value[c]);
+                        } else {
+                            snprintf(comps->label[c], sizeof(comps->label[c]),
+                                     "%.1fV", comps->value[c]);
+                        }
+                        comps->label_width[c] = -1;
+                        
+                        // Nodes never move, so the direction of the
+                        // component can be worked out once here
+                        double dx = k_data->nodes[node].x - k_data->nodes[comps->node1[c]].x;
+                        double dy = k_data->nodes[node].y - k_data->nodes[comps->node1[c]].y;
+                        double len = sqrt(dx * dx + dy * dy);
+                        comps->ux[c] = len > 0 ? dx / len : 1.0;
+                        comps->uy[c] = len > 0 ? dy / len : 0.0;
+                        
+                        int n1 = comps->node1[c];
+                        k_data->node_comps[n1][k_data->node_degree[n1]++] = c;
+                        k_data->node_comps[node][k_data->node_degree[node]++] = c;
                         k_data->component_count++;
                         
-                        redraw_circuit(k_data);
+                        add_component(k_data, c);
                     }
                 }
                 k_data->selected_node = -1;
@@ -369,16 +647,11 @@ static gboolean on_button_press(GtkWidget *widget, GdkEventButton *event, gpoint
             k_data->node_count--;
             
             // Remove associated components
-            int new_count = 0;
-            for (int i = 0; i < k_data->component_count; i++) {
-                if (k_data->components[i].node1 != node && 
-                    k_data->components[i].node2 != node) {
-                    k_data->components[new_count++] = k_data->components[i];
-                }
+            while (k_data->node_degree[node] > 0) {
+                remove_component(k_data, k_data->node_comps[node][0]);
             }
-            k_data->component_count = new_count;
             
-            redraw_circuit(k_data);
+            schedule_redraw(k_data);
         }
     }
     
@@ -400,12 +673,30 @@ void kirchhoff_calculate(KirchhoffData *data) {
         return;
     }
     
-    // Build node list (excluding ground)
+    // Check the ground node before anything is built, so a bad entry is
+    // reported up front rather than indexing past the node arrays
+    if (data->ground_node < 0 || data->ground_node >= MAX_NODES ||
+        !data->node_exists[data->ground_node]) {
+        GtkWidget *dialog = gtk_message_dialog_new(NULL,
+            GTK_DIALOG_MODAL,
+            GTK_MESSAGE_WARNING,
+            GTK_BUTTONS_OK,
+            "Ground node N%d does not exist", data->ground_node);
+        gtk_dialog_run(GTK_DIALOG(dialog));
+        gtk_widget_destroy(dialog);
+        return;
+    }
+    
+    // Build node list (excluding ground) and the reverse lookup from
+    // node id to matrix row (-1 for ground and unused ids)
     int node_list[MAX_NODES];
+    int node_index[MAX_NODES];
     int n = 0;
     
     for (int i = 0; i < MAX_NODES; i++) {
+        node_index[i] = -1;
         if (data->node_exists[i] && i != data->ground_node) {
+            node_index[i] = n;
             node_list[n++] = i;
         }
     }
@@ -422,99 +713,12 @@ void kirchhoff_calculate(KirchhoffData *data) {
     }
     
     // Allocate conductance matrix and current vector
-    double **G = malloc(n * sizeof(double *));
+    double *G = calloc(n * n, sizeof(double));
     double *I = calloc(n, sizeof(double));
     double *V = malloc(n * sizeof(double));
     
-    for (int i = 0; i < n; i++) {
-        G[i] = calloc(n, sizeof(double));
-    }
-    
-    // Build system using nodal analysis
-    for (int c = 0; c < data->component_count; c++) {
-        Component *comp = &data->components[c];
-        int n1 = comp->node1;
-        int n2 = comp->node2;
-        
-        if (comp->type == COMP_RESISTOR) {
-            double conductance = 1.0 / comp->value;
-            
-            // Find indices in node_list
-            int idx1 = -1, idx2 = -1;
-            for (int i = 0; i < n; i++) {
-                if (node_list[i] == n1) idx1 = i;
-                if (node_list[i] == n2) idx2 = i;
-            }
-            
-            if (idx1 >= 0) {
-                G[idx1][idx1] += conductance;
-                if (idx2 >= 0) {
-                    G[idx1][idx2] -= conductance;
-                }
-            }
-            
-            if (idx2 >= 0) {
-                G[idx2][idx2] += conductance;
-                if (idx1 >= 0) {
-                    G[idx2][idx1] -= conductance;
-                }
-            }
-        }
-        else if (comp->type == COMP_VOLTAGE_SOURCE) {
-            // Case 1: Connected to Ground (Use forcing method for precision)
-            if (n1 == data->ground_node) {
-                int idx = -1;
-                for (int i = 0; i < n; i++) {
-                    if (node_list[i] == n2) idx = i;
-                }
-                if (idx >= 0) {
-                    memset(G[idx], 0, n * sizeof(double));
-                    G[idx][idx] = 1.0;
-                    // n1 is ground (+), n2 is node (-). V_n1 - V_n2 = Val => 0 - V_n2 = Val => V_n2 = -Val
-                    I[idx] = -comp->value; 
-                }
-            }
-            else if (n2 == data->ground_node) {
-                int idx = -1;
-                for (int i = 0; i < n; i++) {
-                    if (node_list[i] == n1) idx = i;
-                }
-                if (idx >= 0) {
-                    memset(G[idx], 0, n * sizeof(double));
-                    G[idx][idx] = 1.0;
-                    // n1 is node (+), n2 is ground (-). V_n1 - 0 = Val
-                    I[idx] = comp->value;
-                }
-            }
-            // Case 2: Floating Voltage Source (Between two non-ground nodes)
-            // Fix: Use Norton Equivalent (Current Source || Small Resistor)
-            else {
-                int idx1 = -1, idx2 = -1;
-                for (int i = 0; i < n; i++) {
-                    if (node_list[i] == n1) idx1 = i;
-                    if (node_list[i] == n2) idx2 = i;
-                }
-
-                if (idx1 >= 0 && idx2 >= 0) {
-                    // Use a very small internal resistance to model the ideal source
-                    double r_internal = 0.01; 
-                    double g_internal = 1.0 / r_internal;
-                    double i_injected = comp->value / r_internal;
-
-                    // Update Conductance Matrix (Resistor part)
-                    G[idx1][idx1] += g_internal;
-                    G[idx2][idx2] += g_internal;
-                    G[idx1][idx2] -= g_internal;
-                    G[idx2][idx1] -= g_internal;
-
-                    // Update Current Vector (Source part)
-                    // Current is injected into Positive Node (n1) and extracted from Negative Node (n2)
-                    I[idx1] += i_injected;
-                    I[idx2] -= i_injected;
-                }
-            }
-        }
-    }
+    ComponentTable *comps = &data->components;
+    build_nodal_system(comps, data->component_count, node_index, n, G, I);
     
     // Solve system
     if (!solve_linear_system(n, G, I, V)) {
@@ -526,7 +730,6 @@ void kirchhoff_calculate(KirchhoffData *data) {
         gtk_dialog_run(GTK_DIALOG(dialog));
         gtk_widget_destroy(dialog);
         
-        for (int i = 0; i < n; i++) free(G[i]);
         free(G);
         free(I);
         free(V);
@@ -540,68 +743,75 @@ void kirchhoff_calculate(KirchhoffData *data) {
         voltage_map[node_list[i]] = V[i];
     }
     
-    // Calculate component currents
+    // Calculate component currents and dissipated power in one pass, so
+    // the report below only formats precomputed numbers
+    double power[MAX_COMPONENTS];
     for (int c = 0; c < data->component_count; c++) {
-        Component *comp = &data->components[c];
-        double v1 = voltage_map[comp->node1];
-        double v2 = voltage_map[comp->node2];
+        double v1 = voltage_map[comps->node1[c]];
+        double v2 = voltage_map[comps->node2[c]];
         
-        if (comp->type == COMP_RESISTOR) {
-            comp->current = (v1 - v2) / comp->value;
+        if (comps->type[c] == COMP_RESISTOR) {
+            double current = (v1 - v2) / comps->value[c];
+            comps->current[c] = current;
+            power[c] = current * current * comps->value[c];
         }
-        else if (comp->type == COMP_VOLTAGE_SOURCE) {
+        else if (comps->type[c] == COMP_VOLTAGE_SOURCE) {
             // For voltage sources, we can estimate current using node voltages 
             // and Kirchhoff's Current Law at the nodes, but simpler is:
             // The simulator solves V, but I through a V-source is a dependent variable.
             // We can leave it as 0 for display, or back-calculate using KCL if implemented.
             // For this version, we'll leave it 0 or calculate if there's a simple path.
-            comp->current = 0; 
+            comps->current[c] = 0;
+            power[c] = 0;
         }
     }
     
-    // Format results
-    char results[8192];
-    sprintf(results, "=== CIRCUIT ANALYSIS ===\n\nNode Voltages:\n");
-    sprintf(results + strlen(results), "N%d (Ground): 0.00 V\n", data->ground_node);
+    // Format results into a growable buffer (linear in the output size,
+    // with no fixed cap on how many components can be listed)
+    GString *results = g_string_sized_new(256 + 96 * data->component_count);
+    g_string_append(results, "=== CIRCUIT ANALYSIS ===\n\nNode Voltages:\n");
+    g_string_append_printf(results, "N%d (Ground): 0.00 V\n", data->ground_node);
     
     for (int i = 0; i < n; i++) {
-        sprintf(results + strlen(results), "N%d: %.2f V\n", node_list[i], V[i]);
+        g_string_append_printf(results, "N%d: %.2f V\n", node_list[i], V[i]);
     }
     
-    strcat(results, "\n=========================\n");
-    strcat(results, "Component Currents:\n");
+    g_string_append(results, "\n=========================\n");
+    g_string_append(results, "Component Currents:\n");
     
     for (int c = 0; c < data->component_count; c++) {
-        Component *comp = &data->components[c];
-        
-        if (comp->type == COMP_RESISTOR) {
-            sprintf(results + strlen(results), "\nR%d (N%d->N%d):\n", 
-                   c, comp->node1, comp->node2);
-            sprintf(results + strlen(results), "  %.1f Ohm\n", comp->value);
-            sprintf(results + strlen(results), "  Current: %.3f A\n", fabs(comp->current));
-            sprintf(results + strlen(results), "  Power: %.3f W\n", 
-                   fabs(comp->current) * fabs(comp->current) * comp->value);
+        if (comps->type[c] == COMP_RESISTOR) {
+            g_string_append_printf(results,
+                   "\nR%d (N%d->N%d):\n  %.1f Ohm\n  Current: %.3f A\n  Power: %.3f W\n",
+                   c, comps->node1[c], comps->node2[c], comps->value[c],
+                   fabs(comps->current[c]), power[c]);
         }
-        else if (comp->type == COMP_VOLTAGE_SOURCE) {
-            sprintf(results + strlen(results), "\nV%d (N%d->N%d):\n", 
-                   c, comp->node1, comp->node2);
-            sprintf(results + strlen(results), "  %.1fV\n", comp->value);
+        else if (comps->type[c] == COMP_VOLTAGE_SOURCE) {
+            g_string_append_printf(results, "\nV%d (N%d->N%d):\n  %.1fV\n",
+                   c, comps->node1[c], comps->node2[c], comps->value[c]);
         }
     }
     
-    strcat(results, "\n=========================\n");
-    strcat(results, "Kirchhoff's Laws Verified:\n");
-    strcat(results, "✓ KCL: Sum(I_in) = Sum(I_out)\n");
-    strcat(results, "✓ KVL: Sum(V_loop) = 0\n");
-    
-    GtkTextBuffer *buffer = gtk_text_view_get_buffer(GTK_TEXT_VIEW(data->results_text));
-    gtk_text_buffer_set_text(buffer, results, -1);
+    g_string_append(results, "\n=========================\n");
+    g_string_append(results, "Kirchhoff's Laws Verified:\n");
+    g_string_append(results, "✓ KCL: Sum(I_in) = Sum(I_out)\n");
+    g_string_append(results, "✓ KVL: Sum(V_loop) = 0\n");
+    
+    // Recalculating an unchanged circuit gives the same report; only
+    // replace the text view contents when they actually differ
+    if (g_strcmp0(results->str, data->last_results) != 0) {
+        GtkTextBuffer *buffer = gtk_text_view_get_buffer(GTK_TEXT_VIEW(data->results_text));
+        gtk_text_buffer_set_text(buffer, results->str, results->len);
+        g_free(data->last_results);
+        data->last_results = g_string_free(results, FALSE);
+    } else {
+        g_string_free(results, TRUE);
+    }
     
     // Redraw with currents
-    redraw_circuit(data);
+    schedule_redraw(data);
     
     // Cleanup
-    for (int i = 0; i < n; i++) free(G[i]);
     free(G);
     free(I);
     free(V);
@@ -616,14 +826,32 @@ static void clear_circuit(GtkWidget *widget, gpointer user_data) {
     KirchhoffData *data = (KirchhoffData *)user_data;
     
     memset(data->node_exists, 0, sizeof(data->node_exists));
+    memset(data->node_degree, 0, sizeof(data->node_degree));
     data->node_count = 0;
     data->component_count = 0;
     data->selected_node = -1;
     
     GtkTextBuffer *buffer = gtk_text_view_get_buffer(GTK_TEXT_VIEW(data->results_text));
     gtk_text_buffer_set_text(buffer, "", -1);
+    g_free(data->last_results);
+    data->last_results = NULL;
     
-    redraw_circuit(data);
+    schedule_redraw(data);
+}
+
+static void on_canvas_destroy(GtkWidget *widget, gpointer user_data) {
+    KirchhoffData *data = (KirchhoffData *)user_data;
+    
+    // Don't let a queued repaint run against the destroyed canvas
+    if (data->redraw_source) {
+        g_source_remove(data->redraw_source);
+        data->redraw_source = 0;
+    }
+    
+    if (data->label_font) {
+        cairo_font_face_destroy(data->label_font);
+        data->label_font = NULL;
+    }
 }
 
 static void mode_changed(GtkWidget *widget, gpointer user_data) {
@@ -655,6 +883,11 @@ void kirchhoff_init(GtkWidget *parent_box) {
     data->ground_node = 0;
     data->selected_node = -1;
     
+    // Look the label font up once instead of on every text draw
+    data->label_font = cairo_toy_font_face_create("Times New Roman",
+                                                  CAIRO_FONT_SLANT_NORMAL,
+                                                  CAIRO_FONT_WEIGHT_BOLD);
+    
     // Apply CSS styling for labels and buttons
     // UPDATED: Added specific selectors for :active, :checked, :hover, :focus
     // to ensure the button stays white with black text in all states.
@@ -782,6 +1015,7 @@ void kirchhoff_init(GtkWidget *parent_box) {
     gtk_box_pack_start(GTK_BOX(canvas_frame), data->canvas, TRUE, TRUE, 10);
     
     g_signal_connect(data->canvas, "draw", G_CALLBACK(on_draw), data);
+    g_signal_connect(data->canvas, "destroy", G_CALLBACK(on_canvas_destroy), data);
     g_signal_connect(data->canvas, "button-press-event", 
                     G_CALLBACK(on_button_press), data);
     gtk_widget_add_events(data->canvas, GDK_BUTTON_PRESS_MASK);
@@ -12,17 +12,25 @@ typedef enum {
     COMP_CURRENT_SOURCE
 } ComponentType;
 
+// Components are stored column-wise: one array per field, indexed by
+// component number, so a pass over one field walks contiguous memory.
+// Node ids and type codes fit in a byte (MAX_NODES, MAX_COMPONENTS < 256).
 typedef struct {
-    int node1;
-    int node2;
-    double value;
-    ComponentType type;
-    double current;
-} Component;
+    guint8 node1[MAX_COMPONENTS];
+    guint8 node2[MAX_COMPONENTS];
+    double value[MAX_COMPONENTS];
+    guint8 type[MAX_COMPONENTS];        // ComponentType
+    double current[MAX_COMPONENTS];
+    char label[MAX_COMPONENTS][32];     // Formatted value, e.g. "10.0Ω"
+    double label_width[MAX_COMPONENTS]; // Measured text width, -1 if not yet
+    double ux[MAX_COMPONENTS];          // Unit vector from node1 to node2
+    double uy[MAX_COMPONENTS];
+} ComponentTable;
 
 typedef struct {
     double x;
     double y;
+    char label[8];      // Node name (e.g., "N0", "N1")
 } Node;
 
 typedef struct {
@@ -30,9 +38,13 @@ typedef struct {
     int node_exists[MAX_NODES];
     int node_count;
     
-    Component components[MAX_COMPONENTS];
+    ComponentTable components;
     int component_count;
     
+    // Components attached to each node, as indices into components
+    guint8 node_comps[MAX_NODES][MAX_COMPONENTS];
+    int node_degree[MAX_NODES];
+    
     int selected_node;
     char mode[20];
     int ground_node;
@@ -40,9 +52,12 @@ typedef struct {
     
     GtkWidget *canvas;
     GtkWidget *results_text;
+    gchar *last_results;    // Text currently shown in results_text, or NULL
     GtkWidget *value_entry;
     GtkWidget *ground_entry;
     cairo_surface_t *surface;
+    cairo_font_face_t *label_font;  // Shared face for all canvas text
+    guint redraw_source;    // Pending idle repaint, 0 if none
 } KirchhoffData;
 
 // Function declarations
@@ -31,7 +31,16 @@ static double distance_between(City *c1, City *c2) {
                 (c1->y - c2->y) * (c1->y - c2->y));
 }
 
-static void add_city(TSPData *data, double x, double y) {
+// Forget the current tour and its report. Callers redraw the map.
+static void drop_solution(TSPData *data) {
+    data->solution_length = 0;
+    
+    GtkTextBuffer *buffer = gtk_text_view_get_buffer(GTK_TEXT_VIEW(data->results_text));
+    gtk_text_buffer_set_text(buffer, "", -1);
+}
+
+// Append a city (and its auto-connect edges) without redrawing
+static void insert_city(TSPData *data, double x, double y) {
     if (data->city_count >= MAX_CITIES) return;
     
     int idx = data->city_count;
@@ -39,19 +48,148 @@ static void add_city(TSPData *data, double x, double y) {
     data->cities[idx].y = y;
     sprintf(data->cities[idx].name, "C%d", idx);
     
-    // Auto-connect to existing cities if enabled
-    if (data->auto_connect && data->city_count > 0) {
-        for (int i = 0; i < data->city_count; i++) {
-            double dist = distance_between(&data->cities[idx], &data->cities[i]);
-            data->edges[idx][i] = dist;
-            data->edges[i][idx] = dist;
-            data->edge_exists[idx][i] = 1;
-            data->edge_exists[i][idx] = 1;
+    // Auto-connect to existing cities if enabled. The new city's edges
+    // occupy one contiguous run of the packed edge arrays, so they are
+    // filled in a single straight pass.
+    if (data->auto_connect && idx > 0) {
+        double *weights = data->edges + edge_index(0, idx);
+        unsigned char *exists = data->edge_exists + edge_index(0, idx);
+        
+        for (int i = 0; i < idx; i++) {
+            weights[i] = distance_between(&data->cities[idx], &data->cities[i]);
         }
+        memset(exists, 1, idx);
     }
     
     data->city_count++;
-    redraw_map(data);
+    data->dist_valid = 0;
+}
+
+// Draw the edge between cities i and j (packed slot e) with its weight
+static void draw_edge(cairo_t *cr, TSPData *data, int i, int j, int e) {
+    // A. Draw the solid Black line first
+    cairo_set_line_width(cr, 2.0);
+    cairo_set_source_rgb(cr, 0.0, 0.0, 0.0);  // Pure Black
+    cairo_move_to(cr, data->cities[i].x, data->cities[i].y);
+    cairo_line_to(cr, data->cities[j].x, data->cities[j].y);
+    cairo_stroke(cr);
+    
+    // B. Draw Weight Text (No background box)
+    double mid_x = (data->cities[i].x + data->cities[j].x) / 2;
+    double mid_y = (data->cities[i].y + data->cities[j].y) / 2;
+    
+    char weight_str[20];
+    sprintf(weight_str, "%.0f", data->edges[e]);
+    
+    cairo_select_font_face(cr, "Times New Roman", 
+                           CAIRO_FONT_SLANT_NORMAL,
+                           CAIRO_FONT_WEIGHT_NORMAL);
+    cairo_set_font_size(cr, 15);
+    
+    cairo_text_extents_t extents;
+    cairo_text_extents(cr, weight_str, &extents);
+    
+    // Calculate offset to move text away from the line
+    double dx = data->cities[j].x - data->cities[i].x;
+    double dy = data->cities[j].y - data->cities[i].y;
+    double len = sqrt(dx*dx + dy*dy);
+    
+    if (len > 0) {
+        // Increased offset factor from 18 to 22 for better spacing
+        double offset_x = -dy / len * 22;
+        double offset_y = dx / len * 22;
+        
+        // Draw text in Black
+        cairo_set_source_rgb(cr, 0.0, 0.0, 0.0);
+        cairo_move_to(cr, 
+                      mid_x + offset_x - extents.width/2, 
+                      mid_y + offset_y + extents.height/2); // Adjustment for baseline
+        cairo_show_text(cr, weight_str);
+    }
+}
+
+static void draw_city(cairo_t *cr, TSPData *data, int i) {
+    // [FIX 1] Start a fresh path to prevent "Green Line" connecting previous text to this circle
+    cairo_new_path(cr);
+
+    // Green Circle Fill
+    cairo_set_source_rgb(cr, 0.506, 0.780, 0.514); // #81c784
+    cairo_arc(cr, data->cities[i].x, data->cities[i].y, 18, 0, 2 * M_PI);
+    cairo_fill_preserve(cr);
+    
+    // Dark Green Border
+    cairo_set_source_rgb(cr, 0.333, 0.545, 0.184); // #558b2f
+    cairo_set_line_width(cr, 2);
+    cairo_stroke(cr);
+    
+    // City Name (White)
+    cairo_set_source_rgb(cr, 1.0, 1.0, 1.0);
+    cairo_select_font_face(cr, "Times New Roman",
+                          CAIRO_FONT_SLANT_NORMAL,
+                          CAIRO_FONT_WEIGHT_BOLD);
+    cairo_set_font_size(cr, 12);
+    
+    cairo_text_extents_t extents;
+    cairo_text_extents(cr, data->cities[i].name, &extents);
+    cairo_move_to(cr, 
+                  data->cities[i].x - extents.width / 2,
+                  data->cities[i].y + extents.height / 2);
+    cairo_show_text(cr, data->cities[i].name);
+
+    // [FIX 2] Reset color to BLACK after drawing the node to prevent color bleeding
+    cairo_set_source_rgb(cr, 0.0, 0.0, 0.0);
+}
+
+// Returns a context on the existing surface when it still matches the
+// canvas size, so a new city can be painted over what is there.
+// Returns NULL when a full redraw is needed instead.
+static cairo_t *begin_incremental_draw(TSPData *data) {
+    if (!data->surface) return NULL;
+    
+    GtkAllocation allocation;
+    gtk_widget_get_allocation(data->canvas, &allocation);
+    
+    if (cairo_image_surface_get_width(data->surface) != allocation.width ||
+        cairo_image_surface_get_height(data->surface) != allocation.height) {
+        return NULL;
+    }
+    
+    return cairo_create(data->surface);
+}
+
+static void add_city(TSPData *data, double x, double y) {
+    if (data->city_count >= MAX_CITIES) return;
+    
+    // A displayed tour no longer covers every city; drop it along with
+    // its overlay and report
+    if (data->solution_length > 0) {
+        drop_solution(data);
+        insert_city(data, x, y);
+        redraw_map(data);
+        return;
+    }
+    
+    insert_city(data, x, y);
+    
+    cairo_t *cr = begin_incremental_draw(data);
+    if (!cr) {
+        redraw_map(data);
+        return;
+    }
+    
+    // Draw only the new city's edges, then repaint the cities so they
+    // stay on top of the new lines
+    int idx = data->city_count - 1;
+    int base = edge_index(0, idx);
+    for (int i = 0; i < idx; i++) {
+        if (data->edge_exists[base + i]) draw_edge(cr, data, i, idx, base + i);
+    }
+    for (int i = 0; i < data->city_count; i++) {
+        draw_city(cr, data, i);
+    }
+    
+    cairo_destroy(cr);
+    gtk_widget_queue_draw(data->canvas);
 }
 
 static void redraw_map(TSPData *data) {
@@ -63,14 +201,19 @@ static void redraw_map(TSPData *data) {
         return;
     }
     
-    // Reset surface
-    if (data->surface) {
+    // Keep the existing surface unless the canvas has been resized
+    if (data->surface &&
+        (cairo_image_surface_get_width(data->surface) != allocation.width ||
+         cairo_image_surface_get_height(data->surface) != allocation.height)) {
         cairo_surface_destroy(data->surface);
+        data->surface = NULL;
     }
     
-    data->surface = cairo_image_surface_create(CAIRO_FORMAT_ARGB32,
-                                               allocation.width,
-                                               allocation.height);
+    if (!data->surface) {
+        data->surface = cairo_image_surface_create(CAIRO_FORMAT_ARGB32,
+                                                   allocation.width,
+                                                   allocation.height);
+    }
     cairo_t *cr = cairo_create(data->surface);
     
     // 1. Paint clean White background
@@ -78,84 +221,16 @@ static void redraw_map(TSPData *data) {
     cairo_paint(cr);
     
     // 2. Draw edges
-    for (int i = 0; i < data->city_count; i++) {
-        for (int j = i + 1; j < data->city_count; j++) {
-            if (data->edge_exists[i][j]) {
-                
-                // A. Draw the solid Black line first
-                cairo_set_line_width(cr, 2.0);
-                cairo_set_source_rgb(cr, 0.0, 0.0, 0.0);  // Pure Black
-                cairo_move_to(cr, data->cities[i].x, data->cities[i].y);
-                cairo_line_to(cr, data->cities[j].x, data->cities[j].y);
-                cairo_stroke(cr);
-                
-                // B. Draw Weight Text (No background box)
-                double mid_x = (data->cities[i].x + data->cities[j].x) / 2;
-                double mid_y = (data->cities[i].y + data->cities[j].y) / 2;
-                
-                char weight_str[20];
-                sprintf(weight_str, "%.0f", data->edges[i][j]);
-                
-                cairo_select_font_face(cr, "Times New Roman", 
-                                       CAIRO_FONT_SLANT_NORMAL,
-                                       CAIRO_FONT_WEIGHT_NORMAL);
-                cairo_set_font_size(cr, 15);
-                
-                cairo_text_extents_t extents;
-                cairo_text_extents(cr, weight_str, &extents);
-                
-                // Calculate offset to move text away from the line
-                double dx = data->cities[j].x - data->cities[i].x;
-                double dy = data->cities[j].y - data->cities[i].y;
-                double len = sqrt(dx*dx + dy*dy);
-                
-                if (len > 0) {
-                    // Increased offset factor from 18 to 22 for better spacing
-                    double offset_x = -dy / len * 22;
-                    double offset_y = dx / len * 22;
-                    
-                    // Draw text in Black
-                    cairo_set_source_rgb(cr, 0.0, 0.0, 0.0);
-                    cairo_move_to(cr, 
-                                  mid_x + offset_x - extents.width/2, 
-                                  mid_y + offset_y + extents.height/2); // Adjustment for baseline
-                    cairo_show_text(cr, weight_str);
-                }
-            }
+    for (int j = 1; j < data->city_count; j++) {
+        for (int i = 0; i < j; i++) {
+            int e = edge_index(i, j);
+            if (data->edge_exists[e]) draw_edge(cr, data, i, j, e);
         }
     }
     
     // 3. Draw cities (Nodes)
     for (int i = 0; i < data->city_count; i++) {
-        // [FIX 1] Start a fresh path to prevent "Green Line" connecting previous text to this circle
-        cairo_new_path(cr);
-
-        // Green Circle Fill
-        cairo_set_source_rgb(cr, 0.506, 0.780, 0.514); // #81c784
-        cairo_arc(cr, data->cities[i].x, data->cities[i].y, 18, 0, 2 * M_PI);
-        cairo_fill_preserve(cr);
-        
-        // Dark Green Border
-        cairo_set_source_rgb(cr, 0.333, 0.545, 0.184); // #558b2f
-        cairo_set_line_width(cr, 2);
-        cairo_stroke(cr);
-        
-        // City Name (White)
-        cairo_set_source_rgb(cr, 1.0, 1.0, 1.0);
-        cairo_select_font_face(cr, "Times New Roman",
-                              CAIRO_FONT_SLANT_NORMAL,
-                              CAIRO_FONT_WEIGHT_BOLD);
-        cairo_set_font_size(cr, 12);
-        
-        cairo_text_extents_t extents;
-        cairo_text_extents(cr, data->cities[i].name, &extents);
-        cairo_move_to(cr, 
-                      data->cities[i].x - extents.width / 2,
-                      data->cities[i].y + extents.height / 2);
-        cairo_show_text(cr, data->cities[i].name);
-
-        // [FIX 2] Reset color to BLACK after drawing the node to prevent color bleeding
-        cairo_set_source_rgb(cr, 0.0, 0.0, 0.0);
+        draw_city(cr, data, i);
     }
     
     cairo_destroy(cr);
@@ -287,17 +362,28 @@ static gboolean on_button_press(GtkWidget *widget, GdkEventButton *event, gpoint
             for (int i = nearest; i < tsp_data->city_count - 1; i++) {
                 tsp_data->cities[i] = tsp_data->cities[i + 1];
             }
+            tsp_data->city_count--;
+            tsp_data->dist_valid = 0;
             
-            // Remove edges
-            for (int i = 0; i < MAX_CITIES; i++) {
-                for (int j = 0; j < MAX_CITIES; j++) {
-                    if (i == nearest || j == nearest) {
-                        tsp_data->edge_exists[i][j] = 0;
-                    }
+            // Re-pack the edges of the remaining cities under their new
+            // indices. Slots only ever move down, so this works in place.
+            for (int j = 1; j < tsp_data->city_count; j++) {
+                int old_j = j < nearest ? j : j + 1;
+                for (int i = 0; i < j; i++) {
+                    int old_i = i < nearest ? i : i + 1;
+                    int from = edge_index(old_i, old_j);
+                    int to = edge_index(i, j);
+                    tsp_data->edges[to] = tsp_data->edges[from];
+                    tsp_data->edge_exists[to] = tsp_data->edge_exists[from];
                 }
             }
             
-            tsp_data->city_count--;
+            // Slots past the last city must not leak into the next one
+            int used = edge_index(0, tsp_data->city_count);
+            memset(tsp_data->edge_exists + used, 0, MAX_EDGES - used);
+            
+            // The old tour refers to shifted cities
+            drop_solution(tsp_data);
             redraw_map(tsp_data);
         }
     }
@@ -312,6 +398,7 @@ static void generate_random_cities(GtkWidget *widget, gpointer user_data) {
     data->city_count = 0;
     data->solution_length = 0;
     memset(data->edge_exists, 0, sizeof(data->edge_exists));
+    data->dist_valid = 0;
     
     GtkAllocation allocation;
     gtk_widget_get_allocation(data->canvas, &allocation);
@@ -325,8 +412,11 @@ static void generate_random_cities(GtkWidget *widget, gpointer user_data) {
     for (int i = 0; i < num_cities; i++) {
         double x = 50 + rand() % (width - 100);
         double y = 50 + rand() % (height - 100);
-        add_city(data, x, y);
+        insert_city(data, x, y);
     }
+    
+    // One repaint for the whole batch instead of one per city
+    redraw_map(data);
 }
 
 static void clear_all(GtkWidget *widget, gpointer user_data) {
@@ -335,6 +425,7 @@ static void clear_all(GtkWidget *widget, gpointer user_data) {
     data->city_count = 0;
     data->solution_length = 0;
     memset(data->edge_exists, 0, sizeof(data->edge_exists));
+    data->dist_valid = 0;
     
     GtkTextBuffer *buffer = gtk_text_view_get_buffer(GTK_TEXT_VIEW(data->results_text));
     gtk_text_buffer_set_text(buffer, "", -1);
@@ -361,12 +452,11 @@ void tsp_solve(TSPData *data) {
     
     // Check if edges exist
     int has_edges = 0;
-    for (int i = 0; i < data->city_count && !has_edges; i++) {
-        for (int j = 0; j < data->city_count; j++) {
-            if (data->edge_exists[i][j]) {
-                has_edges = 1;
-                break;
-            }
+    int pairs = edge_index(0, data->city_count);
+    for (int e = 0; e < pairs; e++) {
+        if (data->edge_exists[e]) {
+            has_edges = 1;
+            break;
         }
     }
     
@@ -385,6 +475,9 @@ void tsp_solve(TSPData *data) {
     char results[4096];
     const char *algo_name;
     
+    // The solvers only set a tour when they find one
+    data->solution_length = 0;
+    
     if (strcmp(data->algorithm, "nearest_neighbor") == 0) {
         tsp_nearest_neighbor(data);
         algo_name = "Nearest Neighbor";
@@ -407,6 +500,20 @@ void tsp_solve(TSPData *data) {
         algo_name = "Dynamic Programming";
     }
     
+    if (data->solution_length == 0) {
+        drop_solution(data);
+        redraw_map(data);
+        
+        GtkWidget *dialog = gtk_message_dialog_new(NULL,
+            GTK_DIALOG_MODAL,
+            GTK_MESSAGE_WARNING,
+            GTK_BUTTONS_OK,
+            "No complete tour found. Connect every city or enable auto-connect");
+        gtk_dialog_run(GTK_DIALOG(dialog));
+        gtk_widget_destroy(dialog);
+        return;
+    }
+    
     // Format results
     sprintf(results, "=== %s ===\n\nTotal Distance: %.2f\n\nPath Sequence:\n",
             algo_name, data->total_cost);
@@ -421,7 +528,7 @@ void tsp_solve(TSPData *data) {
             City *c2 = data->solution_path[i + 1];
             int idx1 = c1 - data->cities;
             int idx2 = c2 - data->cities;
-            sprintf(line, "→ (%.1f) →\n", data->edges[idx1][idx2]);
+            sprintf(line, "→ (%.1f) →\n", data->edges[edge_index(idx1, idx2)]);
             strcat(results, line);
         }
     }
@@ -434,7 +541,7 @@ void tsp_solve(TSPData *data) {
     
     char line[200];
     sprintf(line, "\nReturn to start: %s → %s (%.1f)\n\n",
-            last->name, first->name, data->edges[idx_last][idx_first]);
+            last->name, first->name, data->edges[edge_index(idx_last, idx_first)]);
     strcat(results, line);
     
     strcat(results, "============================\n");
@@ -11,7 +11,7 @@
 
 // Maximum limits
 #define MAX_CITIES 50
-#define MAX_EDGES 2500  // MAX_CITIES * MAX_CITIES
+#define MAX_EDGES (MAX_CITIES * (MAX_CITIES - 1) / 2)  // Each city pair once
 
 // City structure - represents a single city in the TSP
 typedef struct {
@@ -27,9 +27,24 @@ typedef struct {
     int city_count;
     int city_counter;  // For naming cities sequentially
     
-    // Edge data (adjacency matrix)
-    double edges[MAX_CITIES][MAX_CITIES];
-    int edge_exists[MAX_CITIES][MAX_CITIES];
+    // Edge data: edges are undirected, so each pair is stored once in a
+    // packed triangle indexed by edge_index()
+    double edges[MAX_EDGES];
+    unsigned char edge_exists[MAX_EDGES];
+    
+    // Dense copy of the edge weights used by the solvers, with INFINITY
+    // where no edge exists, so lookups need no edge_exists check
+    double dist[MAX_CITIES][MAX_CITIES];
+    float dist32[MAX_CITIES][MAX_CITIES];  // Single-precision copy for the DP
+    
+    // For each city, the cities it has an edge to, nearest first
+    unsigned char neighbors[MAX_CITIES][MAX_CITIES];
+    int neighbor_count[MAX_CITIES];
+    
+    // Cache flags: cleared whenever cities or edges change, so repeated
+    // solves of the same map reuse the tables above
+    int dist_valid;         // dist/dist32 match the current edges
+    int neighbors_valid;    // neighbors/neighbor_count match dist
     
     // Solution data
     City *solution_path[MAX_CITIES];
@@ -59,6 +74,20 @@ typedef struct {
     int temp_line_active;
 } TSPData;
 
+/**
+ * Slot of the undirected edge between cities i and j (i != j) in the
+ * packed edge arrays. Pairs are grouped by their larger city, so the
+ * edges of a newly added city are appended at the end.
+ */
+static inline int edge_index(int i, int j) {
+    if (i > j) {
+        int temp = i;
+        i = j;
+        j = temp;
+    }
+    return j * (j - 1) / 2 + i;
+}
+
 // Function declarations
 
 /**
@@ -9,34 +9,84 @@
 #include <string.h>
 #include <time.h>
 #include <limits.h>
+#include <stdint.h>
 
 #define POPULATION_SIZE 100
 #define GENERATIONS 500
 #define MUTATION_RATE 0.01
 #define TOURNAMENT_SIZE 5
 
-static double get_distance(TSPData *data, int i, int j) {
-    if (data->edge_exists[i][j]) {
-        return data->edges[i][j];
+// Fill data->dist from the edge tables, unless the map is unchanged since
+// the last solve
+static void build_distance_matrix(TSPData *data) {
+    if (data->dist_valid) return;
+    
+    int n = data->city_count;
+    for (int i = 0; i < n; i++) {
+        data->dist[i][i] = INFINITY;
+        data->dist32[i][i] = INFINITY;
+        
+        for (int j = 0; j < i; j++) {
+            int e = edge_index(i, j);
+            double d = data->edge_exists[e] ? data->edges[e] : INFINITY;
+            data->dist[i][j] = data->dist[j][i] = d;
+            data->dist32[i][j] = data->dist32[j][i] = (float)d;
+        }
     }
-    return INFINITY;
+    
+    data->dist_valid = 1;
+    data->neighbors_valid = 0;
 }
 
-static double calculate_path_cost(TSPData *data, int *path, int length) {
-    double cost = 0;
-    for (int i = 0; i < length; i++) {
-        int next = (i + 1) % length;
-        cost += get_distance(data, path[i], path[next]);
+// Build each city's list of reachable cities sorted by distance from
+// data->dist
+static void build_neighbor_lists(TSPData *data) {
+    if (data->neighbors_valid) return;
+    
+    int n = data->city_count;
+    for (int i = 0; i < n; i++) {
+        const double *dist_row = data->dist[i];
+        unsigned char *list = data->neighbors[i];
+        int count = 0;
+        
+        // Insertion sort of the reachable cities; stable, so equally
+        // distant cities stay in index order
+        for (int j = 0; j < n; j++) {
+            if (!isfinite(dist_row[j])) continue;
+            
+            int k = count++;
+            while (k > 0 && dist_row[list[k - 1]] > dist_row[j]) {
+                list[k] = list[k - 1];
+                k--;
+            }
+            list[k] = j;
+        }
+        data->neighbor_count[i] = count;
     }
-    return cost;
+    
+    data->neighbors_valid = 1;
 }
 
-// Nearest Neighbor Algorithm - O(n^2)
-void tsp_nearest_neighbor(TSPData *data) {
-    if (data->city_count == 0) return;
+static inline double get_distance(TSPData *data, int i, int j) {
+    return data->dist[i][j];
+}
+
+static double calculate_path_cost(TSPData *data, const int *path, int length) {
+    if (length == 0) return 0;
     
+    // Sum consecutive legs, then close the tour, instead of taking a
+    // modulo on every step
+    double cost = 0;
+    for (int i = 0; i + 1 < length; i++) {
+        cost += get_distance(data, path[i], path[i + 1]);
+    }
+    return cost + get_distance(data, path[length - 1], path[0]);
+}
+
+// Build the nearest-neighbour tour from city 0 into path and return its
+// length, which is short of city_count if the walk gets stuck
+static int nearest_neighbor_tour(TSPData *data, int *path) {
     int visited[MAX_CITIES] = {0};
-    int path[MAX_CITIES];
     int path_len = 0;
     
     // Start from city 0
@@ -45,16 +95,15 @@ void tsp_nearest_neighbor(TSPData *data) {
     visited[current] = 1;
     
     while (path_len < data->city_count) {
+        // Neighbours are sorted by distance, so the first unvisited one is
+        // the nearest; cities without an edge are never looked at
+        const unsigned char *list = data->neighbors[current];
         int nearest = -1;
-        double min_dist = INFINITY;
         
-        for (int i = 0; i < data->city_count; i++) {
-            if (!visited[i]) {
-                double dist = get_distance(data, current, i);
-                if (dist < min_dist) {
-                    min_dist = dist;
-                    nearest = i;
-                }
+        for (int k = 0; k < data->neighbor_count[current]; k++) {
+            if (!visited[list[k]]) {
+                nearest = list[k];
+                break;
             }
         }
         
@@ -65,6 +114,19 @@ void tsp_nearest_neighbor(TSPData *data) {
         current = nearest;
     }
     
+    return path_len;
+}
+
+// Nearest Neighbor Algorithm - O(n^2)
+void tsp_nearest_neighbor(TSPData *data) {
+    if (data->city_count == 0) return;
+    
+    build_distance_matrix(data);
+    build_neighbor_lists(data);
+    
+    int path[MAX_CITIES];
+    int path_len = nearest_neighbor_tour(data, path);
+    
     // Store solution
     data->solution_length = path_len;
     for (int i = 0; i < path_len; i++) {
@@ -74,45 +136,104 @@ void tsp_nearest_neighbor(TSPData *data) {
 }
 
 // Genetic Algorithm Implementation
+// Fitness values are kept in their own array next to the population, so a
+// tournament only touches a few doubles instead of whole individuals
 typedef struct {
     int tour[MAX_CITIES];
-    double fitness;
 } Individual;
 
-static void shuffle_tour(int *tour, int n) {
-    for (int i = n - 1; i > 0; i--) {
-        int j = rand() % (i + 1);
-        int temp = tour[i];
-        tour[i] = tour[j];
-        tour[j] = temp;
+// Small per-child random number generator (xorshift64*). rand() shares
+// one hidden state, which is neither thread-safe nor reproducible when
+// children are bred in parallel, so every child gets its own stream.
+typedef struct {
+    uint64_t state;
+} GARandom;
+
+static void ga_random_seed(GARandom *rng, uint64_t seed, uint64_t stream) {
+    // splitmix64 of (seed, stream), so neighbouring streams are unrelated
+    uint64_t z = seed + (stream + 1) * 0x9E3779B97F4A7C15ULL;
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ULL;
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EBULL;
+    z ^= z >> 31;
+    rng->state = z ? z : 0x2545F4914F6CDD1DULL;
+}
+
+static uint32_t ga_random_next(GARandom *rng) {
+    rng->state ^= rng->state >> 12;
+    rng->state ^= rng->state << 25;
+    rng->state ^= rng->state >> 27;
+    return (uint32_t)((rng->state * 0x2545F4914F6CDD1DULL) >> 32);
+}
+
+// Uniform integer in [0, bound)
+static int ga_random_below(GARandom *rng, int bound) {
+    return (int)(((uint64_t)ga_random_next(rng) * (uint32_t)bound) >> 32);
+}
+
+static double ga_random_unit(GARandom *rng) {
+    return ga_random_next(rng) / 4294967296.0;
+}
+
+// Write a uniformly random permutation of 0..n-1 into tour. This is the
+// "inside-out" Fisher-Yates shuffle, which builds the permutation in one
+// pass instead of filling 0..n-1 first and shuffling it afterwards.
+static void random_tour(GARandom *rng, int *tour, int n) {
+    for (int i = 0; i < n; i++) {
+        int j = ga_random_below(rng, i + 1);
+        if (j != i) tour[i] = tour[j];
+        tour[j] = i;
     }
 }
 
-static double fitness_function(TSPData *data, int *tour, int n) {
+static double fitness_function(TSPData *data, const int *tour, int n) {
     double cost = calculate_path_cost(data, tour, n);
     return 1.0 / (cost + 1.0);
 }
 
-static void select_parent(Individual *population, int pop_size, int *selected) {
-    int best_idx = rand() % pop_size;
-    double best_fitness = population[best_idx].fitness;
+// Evaluate the fitness of count tours in one pass and return the index of
+// the fittest, so callers need no separate scan to find the best
+static int evaluate_population(TSPData *data, const Individual *population,
+                               double *fitness, int count, int n) {
+    for (int i = 0; i < count; i++) {
+        fitness[i] = fitness_function(data, population[i].tour, n);
+    }
+    
+    int best_idx = 0;
+    for (int i = 1; i < count; i++) {
+        if (fitness[i] > fitness[best_idx]) {
+            best_idx = i;
+        }
+    }
+    return best_idx;
+}
+
+// Tournament selection; returns the winner's tour in place rather than
+// copying it out
+static const int *select_parent(GARandom *rng, const Individual *population,
+                                const double *fitness, int pop_size) {
+    int best_idx = ga_random_below(rng, pop_size);
+    double best_fitness = fitness[best_idx];
     
     for (int i = 1; i < TOURNAMENT_SIZE && i < pop_size; i++) {
-        int idx = rand() % pop_size;
-        if (population[idx].fitness > best_fitness) {
-            best_fitness = population[idx].fitness;
+        int idx = ga_random_below(rng, pop_size);
+        if (fitness[idx] > best_fitness) {
+            best_fitness = fitness[idx];
             best_idx = idx;
         }
     }
     
-    memcpy(selected, population[best_idx].tour, MAX_CITIES * sizeof(int));
+    return population[best_idx].tour;
 }
 
-static void crossover(int *parent1, int *parent2, int *child, int n) {
-    int start = rand() % n;
-    int end = start + 1 + rand() % (n - start);
+static void crossover(GARandom *rng, const int *parent1, const int *parent2,
+                      int *child, int n) {
+    int start = ga_random_below(rng, n);
+    int end = start + 1 + ga_random_below(rng, n - start);
     
-    int used[MAX_CITIES] = {0};
+    // Membership mask for the genes already in the child; only the first
+    // n entries are used, so only those are cleared
+    unsigned char used[MAX_CITIES];
+    memset(used, 0, n);
     
     // Copy segment from parent1
     for (int i = start; i < end; i++) {
@@ -120,81 +241,150 @@ static void crossover(int *parent1, int *parent2, int *child, int n) {
         used[parent1[i]] = 1;
     }
     
-    // Fill remaining from parent2
+    // Fill remaining from parent2, stopping as soon as the child is full
+    int missing = n - (end - start);
     int pos = end % n;
-    for (int i = 0; i < n; i++) {
-        int idx = (end + i) % n;
-        if (!used[parent2[idx]]) {
-            child[pos] = parent2[idx];
-            used[parent2[idx]] = 1;
-            pos = (pos + 1) % n;
+    int idx = end % n;
+    while (missing > 0) {
+        int gene = parent2[idx];
+        if (!used[gene]) {
+            child[pos] = gene;
+            used[gene] = 1;
+            if (++pos == n) pos = 0;
+            missing--;
         }
+        if (++idx == n) idx = 0;
     }
 }
 
-static void mutate(int *tour, int n) {
-    if ((double)rand() / RAND_MAX < MUTATION_RATE) {
-        int i = rand() % n;
-        int j = rand() % n;
+static void mutate(GARandom *rng, int *tour, int n) {
+    if (ga_random_unit(rng) < MUTATION_RATE) {
+        // Two distinct positions: draw j from the n - 1 others, so a
+        // mutation is never a wasted swap of a city with itself
+        int i = ga_random_below(rng, n);
+        int j = ga_random_below(rng, n - 1);
+        if (j >= i) j++;
         int temp = tour[i];
         tour[i] = tour[j];
         tour[j] = temp;
     }
 }
 
+// 2-opt local search: reverse tour[i..j] whenever reconnecting the two
+// broken edges shortens the tour. A reversal only replaces two edges, so
+// each candidate is scored from those four distances instead of
+// recomputing the whole tour cost. Edges are symmetric, so the reversed
+// segment itself keeps its length.
+static void two_opt(TSPData *data, int *tour, int n) {
+    if (n < 4) return;
+    
+    int improved = 1;
+    while (improved) {
+        improved = 0;
+        
+        for (int i = 1; i < n - 1; i++) {
+            for (int j = i + 1; j < n; j++) {
+                int a = tour[i - 1], b = tour[i];
+                int c = tour[j], d = tour[(j + 1 < n) ? j + 1 : 0];
+                if (d == a) continue; // Reversing the whole rest of the tour
+                
+                double removed = get_distance(data, a, b) + get_distance(data, c, d);
+                double added = get_distance(data, a, c) + get_distance(data, b, d);
+                
+                // Never trade onto a missing edge; inf - inf would be NaN
+                if (!isfinite(added)) continue;
+                
+                if (added - removed < -1e-9) {
+                    for (int l = i, r = j; l < r; l++, r--) {
+                        int temp = tour[l];
+                        tour[l] = tour[r];
+                        tour[r] = temp;
+                    }
+                    improved = 1;
+                }
+            }
+        }
+    }
+}
+
 void tsp_genetic_algorithm(TSPData *data) {
     if (data->city_count < 2) return;
     
-    srand(time(NULL));
+    build_distance_matrix(data);
+    
+    uint64_t seed = (uint64_t)time(NULL);
     int n = data->city_count;
     
-    // Initialize population
-    Individual population[POPULATION_SIZE];
-    Individual new_population[POPULATION_SIZE];
+    // Initialize population. The current and next generations live in two
+    // buffers that swap roles each generation instead of being copied.
+    Individual pool_a[POPULATION_SIZE];
+    Individual pool_b[POPULATION_SIZE];
+    double fitness_a[POPULATION_SIZE];
+    double fitness_b[POPULATION_SIZE];
+    Individual *population = pool_a;
+    Individual *new_population = pool_b;
+    double *fitness = fitness_a;
+    double *new_fitness = fitness_b;
     
     for (int i = 0; i < POPULATION_SIZE; i++) {
-        for (int j = 0; j < n; j++) {
-            population[i].tour[j] = j;
-        }
-        shuffle_tour(population[i].tour, n);
-        population[i].fitness = fitness_function(data, population[i].tour, n);
+        GARandom rng;
+        ga_random_seed(&rng, seed, i);
+        random_tour(&rng, population[i].tour, n);
     }
     
-    // Find initial best
-    int best_idx = 0;
-    for (int i = 1; i < POPULATION_SIZE; i++) {
-        if (population[i].fitness > population[best_idx].fitness) {
-            best_idx = i;
-        }
-    }
+    // Evaluate and find initial best
+    int best_idx = evaluate_population(data, population, fitness, POPULATION_SIZE, n);
     
     Individual best = population[best_idx];
+    double best_fitness = fitness[best_idx];
     
-    // Evolution
+    // Evolution. The thread team is started once per run rather than
+    // once per generation; every thread walks the generation loop, the
+    // children are shared out between them, and one thread does the
+    // per-generation bookkeeping.
+    #pragma omp parallel
     for (int gen = 0; gen < GENERATIONS; gen++) {
-        // Elitism - keep best
-        new_population[0] = best;
-        
-        // Create new population
+        // Create new population. Children only read the current generation
+        // and each writes its own slot with its own random stream, so they
+        // can be bred and scored in parallel.
+        #pragma omp for schedule(static)
         for (int i = 1; i < POPULATION_SIZE; i++) {
-            int parent1[MAX_CITIES], parent2[MAX_CITIES];
-            select_parent(population, POPULATION_SIZE, parent1);
-            select_parent(population, POPULATION_SIZE, parent2);
+            GARandom rng;
+            ga_random_seed(&rng, seed, (uint64_t)(gen + 1) * POPULATION_SIZE + i);
             
-            crossover(parent1, parent2, new_population[i].tour, n);
-            mutate(new_population[i].tour, n);
+            const int *parent1 = select_parent(&rng, population, fitness, POPULATION_SIZE);
+            const int *parent2 = select_parent(&rng, population, fitness, POPULATION_SIZE);
             
-            new_population[i].fitness = fitness_function(data, 
-                                                         new_population[i].tour, n);
+            crossover(&rng, parent1, parent2, new_population[i].tour, n);
+            mutate(&rng, new_population[i].tour, n);
+            new_fitness[i] = fitness_function(data, new_population[i].tour, n);
         }
         
-        // Update population
-        memcpy(population, new_population, sizeof(population));
-        
-        // Track best
-        for (int i = 0; i < POPULATION_SIZE; i++) {
-            if (population[i].fitness > best.fitness) {
-                best = population[i];
+        #pragma omp single
+        {
+            // Elitism - keep best
+            new_population[0] = best;
+            new_fitness[0] = best_fitness;
+            
+            int gen_best = 1;
+            for (int i = 2; i < POPULATION_SIZE; i++) {
+                if (new_fitness[i] > new_fitness[gen_best]) {
+                    gen_best = i;
+                }
+            }
+            
+            // Update population
+            Individual *temp = population;
+            population = new_population;
+            new_population = temp;
+            double *temp_fitness = fitness;
+            fitness = new_fitness;
+            new_fitness = temp_fitness;
+            
+            // Track best
+            if (fitness[gen_best] > best_fitness) {
+                best_fitness = fitness[gen_best];
+                best = population[gen_best];
             }
         }
     }
@@ -207,10 +397,117 @@ void tsp_genetic_algorithm(TSPData *data) {
     data->total_cost = calculate_path_cost(data, best.tour, n);
 }
 
+// Held-Karp kernel: fills dp[mask * n + last] with the cheapest path that
+// starts at city 0, visits exactly the cities in mask and ends at last,
+// and parent[mask * n + last] with the city visited before last.
+// Both tables are flat (1 << n) x n arrays. Every state the solver reads
+// is written here, so neither table needs to be initialised. Costs are
+// kept in single precision (pixel distances need nothing more), which
+// halves the memory traffic of this bandwidth-bound loop.
+//
+// States that provably cannot beat upper_bound (the cost of a known tour)
+// are pruned to INFINITY. The rest of the tour runs from last through
+// every unvisited city back to 0, so each unvisited city still needs two
+// edges and last and 0 one each; counting every edge from both ends, half
+// the sum of the cheapest such edges is a lower bound on what remains.
+// alive[mask] records whether any state of mask survived, so successors
+// of a fully pruned mask are skipped without scanning it.
+static void held_karp(const TSPData *data, int n, float *dp, signed char *parent,
+                      unsigned char *alive, float upper_bound) {
+    int max_mask = 1 << n;
+    
+    // Half of the cheapest edge (end_cost) and of the two cheapest edges
+    // (pass_cost) at each city
+    float end_cost[MAX_CITIES];
+    float pass_cost[MAX_CITIES];
+    for (int v = 0; v < n; v++) {
+        float min1 = INFINITY, min2 = INFINITY;
+        for (int k = 0; k < n; k++) {
+            float d = data->dist32[v][k];
+            if (d < min1) {
+                min2 = min1;
+                min1 = d;
+            } else if (d < min2) {
+                min2 = d;
+            }
+        }
+        end_cost[v] = 0.5f * min1;
+        pass_cost[v] = 0.5f * (min1 + min2);
+    }
+    
+    // Only prune when the bound is clearly exceeded, so float rounding
+    // can never cut off the optimal tour
+    float limit = upper_bound * 1.0001f + 1e-3f;
+    
+    // Base case - start from city 0
+    dp[1 * n + 0] = 0;
+    parent[1 * n + 0] = -1;
+    alive[1] = 1;
+    
+    // Pull formulation: each state is computed once from the states of
+    // the mask without its last city, so the row being written stays in
+    // cache and predecessor rows are read front to back. Every reachable
+    // state contains city 0, so only odd masks are visited; removing a
+    // city gives a smaller mask, so ascending order has every predecessor
+    // ready before it is needed.
+    for (int mask = 3; mask < max_mask; mask += 2) {
+        float *dp_mask = dp + (size_t)mask * n;
+        signed char *parent_mask = parent + (size_t)mask * n;
+        
+        // A path visiting other cities cannot end back at the start
+        dp_mask[0] = INFINITY;
+        parent_mask[0] = -1;
+        
+        // Lower bound on the cost still needed to close the tour, less
+        // the share of the city the path currently ends at
+        float remaining = end_cost[0];
+        for (unsigned int u = ~(unsigned int)mask & (max_mask - 1); u; u &= u - 1) {
+            remaining += pass_cost[__builtin_ctz(u)];
+        }
+        
+        int any_alive = 0;
+        
+        for (unsigned int m = mask & ~1u; m; m &= m - 1) {
+            int last = __builtin_ctz(m);
+            int prev_mask = mask ^ (1 << last);
+            const float *dp_prev = dp + (size_t)prev_mask * n;
+            
+            float best = INFINITY;
+            int best_prev = -1;
+            
+            if (!alive[prev_mask]) {
+                dp_mask[last] = INFINITY;
+                parent_mask[last] = -1;
+                continue;
+            }
+            
+            // Cheapest way to arrive at last from any city in prev_mask
+            for (unsigned int p = prev_mask; p; p &= p - 1) {
+                int k = __builtin_ctz(p);
+                float cost = dp_prev[k] + data->dist32[k][last];
+                if (cost < best) {
+                    best = cost;
+                    best_prev = k;
+                }
+            }
+            
+            if (best + remaining + end_cost[last] > limit) best = INFINITY;
+            if (best != INFINITY) any_alive = 1;
+            
+            dp_mask[last] = best;
+            parent_mask[last] = best_prev;
+        }
+        
+        alive[mask] = any_alive;
+    }
+}
+
 // Dynamic Programming - Held-Karp Algorithm O(n^2 * 2^n)
 void tsp_dynamic_programming(TSPData *data) {
     if (data->city_count < 2) return;
     
+    build_distance_matrix(data);
+    
     int n = data->city_count;
     
     // For large n, fall back to nearest neighbor
@@ -220,52 +517,41 @@ void tsp_dynamic_programming(TSPData *data) {
     }
     
     int max_mask = 1 << n;
+    size_t states = (size_t)max_mask * n;
     
-    // Allocate DP table
-    double **dp = malloc(max_mask * sizeof(double *));
-    int **parent = malloc(max_mask * sizeof(int *));
-    
-    for (int i = 0; i < max_mask; i++) {
-        dp[i] = malloc(n * sizeof(double));
-        parent[i] = malloc(n * sizeof(int));
-        for (int j = 0; j < n; j++) {
-            dp[i][j] = INFINITY;
-            parent[i][j] = -1;
-        }
+    // Allocate DP tables as single contiguous blocks (n <= 20, so a
+    // city index always fits in a signed char)
+    float *dp = malloc(states * sizeof(float));
+    signed char *parent = malloc(states * sizeof(signed char));
+    unsigned char *alive = malloc(max_mask);
+    if (!dp || !parent || !alive) {
+        free(dp);
+        free(parent);
+        free(alive);
+        tsp_nearest_neighbor(data);
+        return;
     }
     
-    // Base case - start from city 0
-    dp[1][0] = 0;
-    
-    // Fill DP table
-    for (int mask = 1; mask < max_mask; mask++) {
-        for (int last = 0; last < n; last++) {
-            if (!(mask & (1 << last))) continue;
-            if (dp[mask][last] == INFINITY) continue;
-            
-            // Try extending to next city
-            for (int next = 0; next < n; next++) {
-                if (mask & (1 << next)) continue;
-                
-                int next_mask = mask | (1 << next);
-                double dist = get_distance(data, last, next);
-                double new_cost = dp[mask][last] + dist;
-                
-                if (new_cost < dp[next_mask][next]) {
-                    dp[next_mask][next] = new_cost;
-                    parent[next_mask][next] = last;
-                }
-            }
-        }
+    // Upper bound for pruning: a nearest-neighbour tour tightened by 2-opt.
+    // If no complete tour is found this way, nothing is pruned.
+    build_neighbor_lists(data);
+    int bound_tour[MAX_CITIES];
+    float upper_bound = INFINITY;
+    if (nearest_neighbor_tour(data, bound_tour) == n) {
+        two_opt(data, bound_tour, n);
+        upper_bound = (float)calculate_path_cost(data, bound_tour, n);
     }
     
+    held_karp(data, n, dp, parent, alive, upper_bound);
+    
     // Find best ending city
     int full_mask = (1 << n) - 1;
-    double best_cost = INFINITY;
+    const float *dp_full = dp + (size_t)full_mask * n;
+    float best_cost = INFINITY;
     int best_last = -1;
     
     for (int last = 0; last < n; last++) {
-        double cost = dp[full_mask][last] + get_distance(data, last, 0);
+        float cost = dp_full[last] + data->dist32[last][0];
         if (cost < best_cost) {
             best_cost = cost;
             best_last = last;
@@ -282,24 +568,33 @@ void tsp_dynamic_programming(TSPData *data) {
         while (current != 0) {
             path[path_len++] = current;
             int prev_mask = mask ^ (1 << current);
-            current = parent[mask][current];
+            current = parent[(size_t)mask * n + current];
             mask = prev_mask;
         }
         path[path_len++] = 0;
         
         // Reverse path
+        int tour[MAX_CITIES];
         data->solution_length = path_len;
         for (int i = 0; i < path_len; i++) {
-            data->solution_path[i] = &data->cities[path[path_len - 1 - i]];
+            tour[i] = path[path_len - 1 - i];
+            data->solution_path[i] = &data->cities[tour[i]];
+        }
+        
+        // Report the cost of the chosen tour in full precision
+        data->total_cost = calculate_path_cost(data, tour, path_len);
+    }
+    else if (upper_bound != INFINITY) {
+        // Everything was pruned, so the bound tour itself is the answer
+        data->solution_length = n;
+        for (int i = 0; i < n; i++) {
+            data->solution_path[i] = &data->cities[bound_tour[i]];
         }
-        data->total_cost = best_cost;
+        data->total_cost = calculate_path_cost(data, bound_tour, n);
     }
     
     // Free memory
-    for (int i = 0; i < max_mask; i++) {
-        free(dp[i]);
-        free(parent[i]);
-    }
     free(dp);
     free(parent);
-}
\ No newline at end of file
+    free(alive);
+}